@@ -2,107 +2,500 @@
 
 import os
 import sys
+import errno
+import logging
+import argparse
 import hashlib
 import shutil
+import struct
+import sqlite3
+import threading
+from array import array
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from PIL import Image
 from PIL.ExifTags import TAGS
 import datetime
 
+# Optional faster (non-cryptographic) hash functions for duplicate detection.
+# Falls back to hashlib's MD5 if neither is installed (pip install xxhash blake3).
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+# Optional progress bar (pip install tqdm)
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None
+
+# Optional EXIF-only reader, avoids going through PIL's image loader (pip install exifread).
+try:
+    import exifread
+except ImportError:
+    exifread = None
+
+# Progress and results are reported through logging instead of print.
+# The level is set with the LOGLEVEL environment variable (default: INFO, DEBUG lists every file moved).
+logger = logging.getLogger(__name__)
+
+def progress(iterable, total, description):
+    """Wraps iterable in a tqdm progress bar when tqdm is installed."""
+    if tqdm is None:
+        return iterable
+    return tqdm(iterable, total=total, desc=description, unit="fichier", leave=False)
+
 # --- PART 1: Scan Files and Identify Photos ---
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff'})
+
+# The stat fields used by the rest of the script (same names as os.stat_result)
+FileStat = namedtuple('FileStat', ['st_size', 'st_mtime', 'st_dev', 'st_ino'])
+
+class ImageFiles:
+    """
+    Compact list of scanned image files, stored as parallel arrays indexed by a file id.
+    Each folder path is stored once in a folder table, files only keep the folder id
+    and their name; stat fields are kept in typed arrays instead of stat_result objects.
+    Iterating yields (path, FileStat) tuples, full paths are rebuilt on demand.
+    exif_dates keeps the EXIF dates already read while looking for duplicates
+    (path -> date string, '' if the file has none), so sorting doesn't read them again.
+    """
+
+    def __init__(self):
+        self.exif_dates = {}
+        self.folders = []
+        self.folder_ids = {}
+        self.file_folder_ids = array('i')
+        self.names = []
+        self.sizes = array('q')
+        self.mtimes = array('d')
+        self.devices = array('Q')
+        self.inodes = array('Q')
+
+    def append(self, folder, name, st):
+        """Adds the file name in folder, with st its stat_result."""
+        folder_id = self.folder_ids.get(folder)
+        if folder_id is None:
+            folder_id = self.folder_ids[folder] = len(self.folders)
+            self.folders.append(folder)
+        self.file_folder_ids.append(folder_id)
+        self.names.append(name)
+        self.sizes.append(st.st_size)
+        self.mtimes.append(st.st_mtime)
+        self.devices.append(st.st_dev)
+        self.inodes.append(st.st_ino)
+
+    def path(self, file_id):
+        """Returns the full path of a file."""
+        return os.path.join(self.folders[self.file_folder_ids[file_id]], self.names[file_id])
+
+    def stat(self, file_id):
+        """Returns the FileStat of a file."""
+        return FileStat(self.sizes[file_id], self.mtimes[file_id], self.devices[file_id], self.inodes[file_id])
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        for file_id in range(len(self)):
+            yield self.path(file_id), self.stat(file_id)
+
+def scan_image_files(folder):
+    """
+    Recursively scans folder with os.scandir and yields a (folder, DirEntry) tuple for each image file.
+    DirEntry objects carry the file type (and on Windows the stat data) returned by
+    the directory listing, which saves a stat() call per file compared to os.walk.
+    """
+    stack = [folder]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        # Get file extension and make it lowercase for case-insensitive comparison
+                        file_extension = os.path.splitext(entry.name)[1].lower()
+                        if file_extension in IMAGE_EXTENSIONS:
+                            yield directory, entry
+        except OSError as e:
+            # Like os.walk, skip unreadable sub-folders and keep scanning
+            logger.error(f"Erreur lors du scan du dossier {directory}: {e}")
+
 def get_image_files(folders):
     """
     Scans the given list of folders recursively to find image files.
-    Returns a list of absolute paths to the image files.
+    Returns an ImageFiles list of the image files.
     """
-    print("\n--- Étape: Scan des fichiers ---")
-    image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff']
-    image_files = []
+    logger.info("\n--- Étape: Scan des fichiers ---")
+    image_files = ImageFiles()
     for folder in folders:
         # Note: Basic folder validation is now done before calling this function
         # (in the main function's input handling)
-        print(f"Scan du dossier: {folder}")
-        try:
-            for root, _, files in os.walk(folder):
-                for file in files:
-                    # Get file extension and make it lowercase for case-insensitive comparison
-                    file_extension = os.path.splitext(file)[1].lower()
-                    if file_extension in image_extensions:
-                        image_files.append(os.path.join(root, file))
-        except Exception as e:
-             print(f"Erreur lors du scan du dossier {folder}: {e}")
-
-    print(f"Trouvé {len(image_files)} fichiers image au total.")
+        logger.info(f"Scan du dossier: {folder}")
+        for directory, entry in scan_image_files(folder):
+            try:
+                image_files.append(directory, entry.name, entry.stat())
+            except OSError as e:
+                logger.error(f"Erreur lors de la lecture de la taille de {entry.path}: {e}")
+
+    logger.info(f"Trouvé {len(image_files)} fichiers image au total.")
     return image_files
 
 # --- PART 2: Duplicate Detection ---
-def calculate_hash(filepath, blocksize=65536):
-    """Calculates the MD5 hash of a file."""
-    hasher = hashlib.md5()
+# Default number of hashing threads. Hashing is I/O bound (the GIL is released
+# during f.read()), so we use more threads than CPU cores to keep the disk busy.
+DEFAULT_MAX_WORKERS = min(32, (os.cpu_count() or 4) * 4)
+
+def new_hasher():
+    """
+    Returns a new hash object for file content comparison.
+    Uses xxHash (xxh3_128) or BLAKE3 when available, MD5 otherwise.
+    """
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+    if blake3 is not None:
+        # Let BLAKE3 hash large files with several threads (tree mode)
+        return blake3.blake3(max_threads=blake3.blake3.AUTO)
+    return hashlib.md5()
+
+def calculate_hash(filepath, blocksize=1 << 20):
+    """Calculates the content hash of a file."""
     try:
-        with open(filepath, 'rb') as f:
-            buf = f.read(blocksize)
-            while len(buf) > 0:
-                hasher.update(buf)
+        # Unbuffered: the reads below already use large blocks
+        with open(filepath, 'rb', buffering=0) as f:
+            if hasattr(os, 'posix_fadvise'):
+                # Tell the kernel we read the whole file sequentially (larger readahead)
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            if hasattr(hashlib, 'file_digest'):
+                # Python 3.11+: reads into a reused buffer, no new bytes object per block
+                hasher = hashlib.file_digest(f, new_hasher)
+            else:
+                hasher = new_hasher()
                 buf = f.read(blocksize)
+                while len(buf) > 0:
+                    hasher.update(buf)
+                    buf = f.read(blocksize)
+            if hasattr(os, 'posix_fadvise'):
+                # The file won't be read again, don't let it evict other data from the page cache
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
         return hasher.hexdigest()
     except (IOError, OSError) as e:
         # print(f"Erreur lors du calcul du hash pour {filepath}: {e}") # Too verbose
         return None # Return None for unreadable files
 
-def find_duplicates(image_paths):
+# --- Hash cache (persisted across runs) ---
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".photo_organizer_cache.sqlite")
+
+def hash_algorithm_name():
+    """Returns the name of the hash algorithm used by new_hasher()."""
+    return new_hasher().name
+
+class HashCache:
+    """
+    SQLite cache of file content hashes, keyed by (path, size, mtime_ns).
+    A file is only re-hashed when its size or modification time changed.
+    Safe to use from several hashing threads. The cache is best-effort: after a
+    database error (e.g. locked by another instance) it is disabled and files
+    are simply hashed.
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, commit_every=500):
+        self.algorithm = hash_algorithm_name()
+        self.commit_every = commit_every
+        self.pending = 0
+        self.disabled = False
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS hashes("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, algorithm TEXT, hash TEXT)"
+        )
+        self.connection.commit()
+
+    def cached_hash(self, filepath):
+        """Returns the hash of filepath, from the cache if it is still valid."""
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return None
+        path = os.path.abspath(filepath)
+        with self.lock:
+            row = None
+            if not self.disabled:
+                try:
+                    row = self.connection.execute(
+                        "SELECT hash FROM hashes WHERE path=? AND size=? AND mtime_ns=? AND algorithm=?",
+                        (path, st.st_size, st.st_mtime_ns, self.algorithm),
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    self.disable(e)
+        if row:
+            return row[0]
+
+        file_hash = calculate_hash(filepath)
+        if file_hash:
+            with self.lock:
+                if not self.disabled:
+                    try:
+                        self.connection.execute(
+                            "INSERT OR REPLACE INTO hashes(path, size, mtime_ns, algorithm, hash) VALUES (?, ?, ?, ?, ?)",
+                            (path, st.st_size, st.st_mtime_ns, self.algorithm, file_hash),
+                        )
+                        # Commit in batches, committing every insert is slow
+                        self.pending += 1
+                        if self.pending >= self.commit_every:
+                            self.connection.commit()
+                            self.pending = 0
+                    except sqlite3.Error as e:
+                        self.disable(e)
+        return file_hash
+
+    def disable(self, error):
+        """Stops using the database after an error. Must be called with the lock held."""
+        logger.warning(f"Attention: Cache des hash désactivé suite à une erreur: {error}")
+        self.disabled = True
+
+    def close(self):
+        """Commits pending inserts and closes the database."""
+        with self.lock:
+            try:
+                if not self.disabled:
+                    self.connection.commit()
+            except sqlite3.Error as e:
+                self.disable(e)
+            finally:
+                self.connection.close()
+
+def calculate_partial_hash(filepath, nbytes=65536, exif_dates=None):
+    """
+    Calculates the content hash of the first nbytes of a file.
+    If exif_dates is a dictionary, the EXIF date found in those same bytes
+    (JPEG/TIFF only) is also stored in it, so the file is not opened again to sort it.
     """
-    Finds duplicate files based on size and then MD5 hash.
+    hasher = new_hasher()
+    try:
+        with open(filepath, 'rb') as f:
+            buf = f.read(nbytes)
+    except (IOError, OSError) as e:
+        return None # Return None for unreadable files
+    hasher.update(buf)
+    if exif_dates is not None:
+        try:
+            exif_dates[filepath] = parse_exif_header(buf, complete=len(buf) < nbytes) or ''
+        except ValueError:
+            pass # Not a JPEG/TIFF or EXIF beyond the header, read it later when sorting
+    return hasher.hexdigest()
+
+def hash_batch(hash_function, filepaths):
+    """Runs hash_function on each file, returns a list of (path, hash) tuples."""
+    return [(p, hash_function(p)) for p in filepaths]
+
+def hash_files(hash_function, filepaths, max_workers=DEFAULT_MAX_WORKERS, description="Hash", batch_size=1):
+    """
+    Runs hash_function on every file concurrently, showing a progress bar.
+    Files are submitted to the threads by batches of batch_size: for small reads,
+    this cuts the per-task scheduling cost, which is otherwise close to the read time.
+    Returns a dictionary mapping each file path to its hash (None if unreadable).
+    """
+    # Keep enough batches to give every thread some work
+    batch_size = max(1, min(batch_size, len(filepaths) // (max_workers * 4)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(hash_batch, hash_function, filepaths[i:i + batch_size])
+                   for i in range(0, len(filepaths), batch_size)]
+
+        def completed_results():
+            for future in as_completed(futures):
+                yield from future.result()
+
+        return dict(progress(completed_results(), len(filepaths), description))
+
+def group_by_hash(file_list, hashes):
+    """Groups file paths by their hash, skipping files whose hash could not be calculated."""
+    files_by_hash = {}
+    for filepath in file_list:
+        file_hash = hashes.get(filepath)
+        if file_hash: # Only if hash was calculated successfully
+            if file_hash not in files_by_hash:
+                files_by_hash[file_hash] = []
+            files_by_hash[file_hash].append(filepath)
+    return files_by_hash
+
+def is_rotational(device):
+    """
+    Returns True if the block device with the given st_dev is a spinning disk.
+    Only detectable on Linux (through /sys), returns False when unknown.
+    """
+    if not hasattr(os, 'major'): # Windows
+        return False
+    sys_dir = f"/sys/dev/block/{os.major(device)}:{os.minor(device)}"
+    # Partitions don't have a queue/ folder, their parent disk does
+    for queue_dir in (os.path.join(sys_dir, "queue"), os.path.join(sys_dir, "..", "queue")):
+        try:
+            with open(os.path.join(queue_dir, "rotational")) as f:
+                return f.read().strip() == "1"
+        except OSError:
+            continue
+    return False
+
+def hash_files_by_device(hash_function, filepaths, disk_order, sequential_devices,
+                         max_workers=DEFAULT_MAX_WORKERS, description="Hash", batch_size=1):
+    """
+    Like hash_files, but files on one of sequential_devices (st_dev values) are hashed
+    one at a time in inode order, a proxy for their position on disk: concurrent reads
+    make hard disk heads seek back and forth. disk_order maps each path to (st_dev, st_ino).
+    """
+    sequential_files = sorted((p for p in filepaths if disk_order[p][0] in sequential_devices), key=disk_order.get)
+    concurrent_files = [p for p in filepaths if disk_order[p][0] not in sequential_devices]
+    hashes = hash_files(hash_function, concurrent_files, max_workers, description, batch_size)
+    hashes.update(hash_files(hash_function, sequential_files, 1, description, batch_size))
+    return hashes
+
+def find_duplicates(image_files, max_workers=DEFAULT_MAX_WORKERS, partial_hash_size=65536, cache_path=DEFAULT_CACHE_PATH,
+                    sequential=None):
+    """
+    Finds duplicate files based on size, then a hash of the first
+    partial_hash_size bytes, and finally the hash of the whole file.
+    image_files is the ImageFiles list returned by get_image_files.
+    Hashing is done concurrently with max_workers threads.
+    Full hashes are cached in the SQLite database cache_path (None disables the cache).
+    If sequential is True, files are hashed one at a time in on-disk (inode) order,
+    which is faster on hard disks. If None, this is done only for the files on a
+    device detected as a hard disk. If False, all files are hashed concurrently.
     Returns a dictionary where keys are hashes and values are lists of file paths.
     Groups with more than one path are duplicates.
     """
-    print("\n--- Étape: Recherche de doublons ---")
-    # First, group by size (optimization)
-    files_by_size = {}
-    for filepath in image_paths:
-        try:
-            # Check if file exists and is accessible before getting size
-            if os.path.exists(filepath):
-                file_size = os.path.getsize(filepath)
-                if file_size not in files_by_size:
-                    files_by_size[file_size] = []
-                files_by_size[file_size].append(filepath)
+    logger.info("\n--- Étape: Recherche de doublons ---")
+    # First, group by size (optimization). Sizes come from the scan, no extra stat needed.
+    # Most sizes are unique in a photo collection: only remember the first file of
+    # each size, a list is allocated only when a second file of that size shows up.
+    first_file_by_size = {}
+    file_ids_by_size = {}
+    for file_id, file_size in enumerate(image_files.sizes):
+        first_file_id = first_file_by_size.setdefault(file_size, file_id)
+        if first_file_id != file_id:
+            file_ids = file_ids_by_size.get(file_size)
+            if file_ids is None:
+                file_ids_by_size[file_size] = [first_file_id, file_id]
             else:
-                 print(f"Attention: Fichier introuvable ou inaccessible, ignoré: {filepath}")
-        except (IOError, OSError) as e:
-             print(f"Erreur lors de la lecture de la taille de {filepath}: {e}")
-             # Skip this file
+                file_ids.append(file_id)
+    del first_file_by_size
 
-    # Now, group by hash for files with the same size
-    duplicates = {}
-    processed_files = 0
-    total_files_to_hash = sum(len(l) for l in files_by_size.values() if len(l) > 1) # Only hash groups > 1 file
+    # Only hash groups > 1 file. Full paths are only built for these files.
+    files_by_size = {}
+    disk_order = {} # path -> (st_dev, st_ino)
+    for file_size, file_ids in file_ids_by_size.items():
+        file_list = files_by_size[file_size] = []
+        for file_id in file_ids:
+            filepath = image_files.path(file_id)
+            file_list.append(filepath)
+            disk_order[filepath] = (image_files.devices[file_id], image_files.inodes[file_id])
+    candidates = list(disk_order)
+
+    devices = {device for device, _ in disk_order.values()}
+    if sequential is None:
+        sequential_devices = {device for device in devices if is_rotational(device)}
+    elif sequential:
+        sequential_devices = devices
+    else:
+        sequential_devices = set()
+    if sequential_devices:
+        logger.info(f"Mode séquentiel (disque dur) pour {len(sequential_devices)}/{len(devices)} périphérique(s): "
+                    "calcul des hash sur un seul thread (--no-sequential pour le désactiver).")
+
+    logger.info(f"Vérification du contenu pour les groupes de taille identique ({len(candidates)} fichiers potentiellement à hacher)...")
 
-    print(f"Vérification du contenu pour les groupes de taille identique ({total_files_to_hash} fichiers potentiellement à hacher)...")
+    # Then, split each size group by a cheap hash of the beginning of the file.
+    # Most same-size photos already differ there, so they never need a full read.
+    # The EXIF date is read from the same bytes and kept for sort_photos.
+    partial_hashes = hash_files_by_device(lambda p: calculate_partial_hash(p, partial_hash_size, image_files.exif_dates),
+                                          candidates, disk_order, sequential_devices, max_workers,
+                                          description="Hash partiels", batch_size=32)
 
+    duplicates = {}
+    groups_to_hash = []
     for size, file_list in files_by_size.items():
         if len(file_list) > 1: # Only process groups with more than one file of the same size
-            files_by_hash = {}
-            for filepath in file_list:
-                file_hash = calculate_hash(filepath)
-                processed_files += 1
-                # Optional: print progress
-                # if processed_files % 100 == 0:
-                #      print(f"Progression hash: {processed_files}/{total_files_to_hash}", end='\r')
-
-                if file_hash: # Only if hash was calculated successfully
-                    if file_hash not in files_by_hash:
-                        files_by_hash[file_hash] = []
-                    files_by_hash[file_hash].append(filepath)
-
-            # Any hash with more than one file path is a duplicate group
-            for file_hash, paths in files_by_hash.items():
+            for partial_hash, paths in group_by_hash(file_list, partial_hashes).items():
                 if len(paths) > 1:
-                    duplicates[file_hash] = paths # Store the group of duplicates
-    # print("\n") # New line after progress print
-    print(f"Recherche de doublons terminée. Trouvé {len(duplicates)} groupes de doublons.")
+                    if size <= partial_hash_size:
+                        # The partial hash already covers the whole file
+                        duplicates[partial_hash] = paths
+                    else:
+                        groups_to_hash.append(paths)
+
+    # Finally, compute the full hash for the groups that still collide
+    cache = None
+    if cache_path:
+        try:
+            cache = HashCache(cache_path)
+        except sqlite3.Error as e:
+            logger.warning(f"Attention: Impossible d'ouvrir le cache des hash {cache_path}: {e}")
+    files_to_hash = [p for l in groups_to_hash for p in l]
+    try:
+        full_hashes = hash_files_by_device(cache.cached_hash if cache else calculate_hash, files_to_hash,
+                                           disk_order, sequential_devices, max_workers, description="Hash complets")
+    finally:
+        if cache:
+            cache.close()
+
+    for file_list in groups_to_hash:
+        # Any hash with more than one file path is a duplicate group
+        for file_hash, paths in group_by_hash(file_list, full_hashes).items():
+            if len(paths) > 1:
+                duplicates[file_hash] = paths # Store the group of duplicates
+    logger.info(f"Recherche de doublons terminée. Trouvé {len(duplicates)} groupes de doublons.")
     return duplicates
 
 # --- PART 3: Duplicate Handling ---
+def move_file(src, dst):
+    """
+    Moves src to dst. Uses a single rename when both are on the same filesystem,
+    and falls back to shutil.move (copy + delete) across filesystems.
+    """
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+
+def reserve_unique_path(path, source_id=None):
+    """
+    Atomically creates an empty placeholder file at path, or at path with a
+    _1, _2, ... suffix if it is taken, and returns the reserved path.
+    Collisions are detected by the exclusive create itself, so there is no
+    exists() check per candidate name. The caller then replaces the placeholder
+    with move_file() (or removes it on failure).
+    source_id is the (st_dev, st_ino) of the file to be moved: if that file
+    already is one of the candidate files, returns None.
+    """
+    base, ext = os.path.splitext(path)
+    counter = 1
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            os.close(fd)
+            return path
+        except FileExistsError:
+            if source_id is not None:
+                # Check if the file at path is actually the SAME file as the source file
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    st = None # Removed in the meantime or a broken symlink: not the source
+                if st is not None and (st.st_dev, st.st_ino) == source_id:
+                    return None
+        path = f"{base}_{counter}{ext}"
+        counter += 1
+
 def handle_duplicates(duplicate_groups, action="list", target_folder="duplicates"):
     """
     Handles the identified duplicate groups.
@@ -110,19 +503,19 @@ def handle_duplicates(duplicate_groups, action="list", target_folder="duplicates
     target_folder: Folder to move duplicates to (if action is "move").
     """
     if not duplicate_groups:
-        print("Aucun doublon trouvé.")
+        logger.info("Aucun doublon trouvé.")
         return
 
-    print("\n--- Gestion des doublons ---")
+    logger.info("\n--- Gestion des doublons ---")
 
     if action == "move":
         if not os.path.exists(target_folder):
             try:
                 os.makedirs(target_folder)
-                print(f"Création du dossier de destination pour les doublons: {target_folder}")
+                logger.info(f"Création du dossier de destination pour les doublons: {target_folder}")
             except OSError as e:
-                print(f"Erreur: Impossible de créer le dossier pour les doublons {target_folder}: {e}")
-                print("Action de déplacement annulée.")
+                logger.error(f"Erreur: Impossible de créer le dossier pour les doublons {target_folder}: {e}")
+                logger.info("Action de déplacement annulée.")
                 action = "list" # Fallback to list if folder creation fails
 
     processed_groups = 0
@@ -131,31 +524,31 @@ def handle_duplicates(duplicate_groups, action="list", target_folder="duplicates
 
     for hash_val, paths in duplicate_groups.items():
         processed_groups += 1
-        print(f"\nGroupe de doublons {processed_groups}/{len(duplicate_groups)} (hash: {hash_val[:8]}...):")
+        logger.info(f"\nGroupe de doublons {processed_groups}/{len(duplicate_groups)} (hash: {hash_val[:8]}...):")
 
         # Decide which one to keep (e.g., the one with the earliest creation date, or just the first one found)
         # For simplicity, we keep the first one in the list provided by find_duplicates.
         original = paths[0]
         duplicates_to_process = paths[1:] # All others are potential duplicates
 
-        print(f"  Original (gardé): {original}")
+        logger.info(f"  Original (gardé): {original}")
 
         if not duplicates_to_process:
-            print("  (Ce groupe n'a qu'un seul fichier, devrait être ignoré si l'algorithme fonctionne correctement)")
+            logger.info("  (Ce groupe n'a qu'un seul fichier, devrait être ignoré si l'algorithme fonctionne correctement)")
             continue
 
-        print("  Doublons trouvés:")
+        logger.info("  Doublons trouvés:")
         for dup_path in duplicates_to_process:
-            print(f"    - {dup_path}")
+            logger.info(f"    - {dup_path}")
 
         if action == "list":
             pass # Already listed above
         elif action == "move":
-            print("  Action: Déplacement des doublons...")
+            logger.info("  Action: Déplacement des doublons...")
             for dup_path in duplicates_to_process:
                 # Check if file still exists before moving (might have been moved/deleted by a previous run)
                 if not os.path.exists(dup_path):
-                     print(f"    Attention: Le doublon {dup_path} n'existe plus, ignoré.")
+                     logger.warning(f"    Attention: Le doublon {dup_path} n'existe plus, ignoré.")
                      continue
                 try:
                     # Construct new path in the target folder
@@ -164,67 +557,186 @@ def handle_duplicates(duplicate_groups, action="list", target_folder="duplicates
                     new_path = os.path.join(target_folder, dup_filename)
 
                     # Handle potential name collisions in target folder
-                    base, ext = os.path.splitext(new_path)
-                    counter = 1
-                    while os.path.exists(new_path):
-                         new_path = f"{base}_{counter}{ext}"
-                         counter += 1
-
-                    shutil.move(dup_path, new_path)
-                    print(f"    Déplacé: {dup_path} -> {new_path}")
+                    new_path = reserve_unique_path(new_path)
+                    try:
+                        move_file(dup_path, new_path)
+                    except (IOError, OSError):
+                        os.remove(new_path) # Release the placeholder
+                        raise
+                    logger.debug(f"    Déplacé: {dup_path} -> {new_path}")
                     moved_count += 1
                 except (IOError, OSError) as e:
-                    print(f"    Erreur lors du déplacement de {dup_path}: {e}")
+                    logger.error(f"    Erreur lors du déplacement de {dup_path}: {e}")
         elif action == "delete":
-             print("  Action: Suppression des doublons...")
+             logger.info("  Action: Suppression des doublons...")
              # !!! DANGEROUS !!! ADD USER CONFIRMATION HERE BEFORE DELETING!
              confirm = input(f"  Confirmez la suppression de {len(duplicates_to_process)} doublons listés ci-dessus [O/N] ? ").lower()
              if confirm == 'o':
                  for dup_path in duplicates_to_process:
                      # Check if file still exists before deleting
                      if not os.path.exists(dup_path):
-                          print(f"    Attention: Le doublon {dup_path} n'existe plus, ignoré pour la suppression.")
+                          logger.warning(f"    Attention: Le doublon {dup_path} n'existe plus, ignoré pour la suppression.")
                           continue
                      try:
                          os.remove(dup_path)
-                         print(f"    Supprimé: {dup_path}")
+                         logger.debug(f"    Supprimé: {dup_path}")
                          deleted_count += 1
                      except (IOError, OSError) as e:
-                         print(f"    Erreur lors de la suppression de {dup_path}: {e}")
+                         logger.error(f"    Erreur lors de la suppression de {dup_path}: {e}")
              else:
-                 print("  Suppression annulée pour ce groupe.")
+                 logger.info("  Suppression annulée pour ce groupe.")
         else:
-            print(f"  Action '{action}' non reconnue. Aucune action effectuée pour ce groupe.")
+            logger.info(f"  Action '{action}' non reconnue. Aucune action effectuée pour ce groupe.")
 
-    print("\n--- Gestion des doublons terminée ---")
+    logger.info("\n--- Gestion des doublons terminée ---")
     if action == "move":
-        print(f"Total de fichiers doublons déplacés: {moved_count}")
+        logger.info(f"Total de fichiers doublons déplacés: {moved_count}")
     elif action == "delete":
-        print(f"Total de fichiers doublons supprimés: {deleted_count}")
+        logger.info(f"Total de fichiers doublons supprimés: {deleted_count}")
 
 
 # --- PART 4: Photo Sorting ---
-def get_photo_date(filepath):
+EXIF_HEADER_SIZE = 65536 # JPEG EXIF data (APP1 segment) is at most 64 KB
+EXIF_IFD_POINTER = 0x8769
+EXIF_DATE_TAGS = (0x9003, 0x9004) # DateTimeOriginal, DateTimeDigitized
+
+def parse_tiff_date(buf, start):
     """
-    Attempts to get the date from EXIF data (DateTimeOriginal or DateTimeDigitized).
-    Falls back to file modification date if EXIF is not available or unreadable.
-    Returns a datetime object or None if date cannot be determined.
+    Reads the EXIF date from the TIFF structure beginning at buf[start]:
+    follows the Exif IFD pointer of IFD0 and returns the first date tag found,
+    or None. Raises struct.error if the data runs past the end of buf.
+    """
+    byte_order = buf[start:start + 2]
+    if byte_order == b'II':
+        endian = '<'
+    elif byte_order == b'MM':
+        endian = '>'
+    else:
+        return None
+
+    def read_ifd(offset):
+        # An IFD is a 2 byte entry count followed by 12 byte entries:
+        # tag (2), type (2), count (4), value or offset to the value (4)
+        entries = {}
+        (count,) = struct.unpack_from(endian + 'H', buf, start + offset)
+        for i in range(count):
+            tag, value_type, value_count, value = struct.unpack_from(endian + 'HHII', buf, start + offset + 2 + 12 * i)
+            entries[tag] = (value_type, value_count, value)
+        return entries
+
+    (ifd0_offset,) = struct.unpack_from(endian + 'I', buf, start + 4)
+    exif_pointer = read_ifd(ifd0_offset).get(EXIF_IFD_POINTER)
+    if exif_pointer is None:
+        return None
+    exif_ifd = read_ifd(exif_pointer[2])
+    for tag in EXIF_DATE_TAGS:
+        entry = exif_ifd.get(tag)
+        if entry and entry[0] == 2 and entry[1] > 4: # ASCII string stored at an offset
+            value_start = start + entry[2]
+            value = buf[value_start:value_start + entry[1]]
+            if len(value) < entry[1]:
+                raise struct.error("EXIF date outside of the buffer")
+            return value.split(b'\x00', 1)[0].decode('ascii', 'replace').strip() or None
+    return None
+
+def find_jpeg_exif(buf, complete):
     """
+    Walks the JPEG segments in buf up to the image data (SOS marker) and returns
+    the offset of the TIFF structure in the "Exif\0\0" APP1 segment, or None if
+    the file has no EXIF. complete tells if buf holds the whole file.
+    Raises ValueError if buf ends before the EXIF segment or the image data.
+    """
+    pos = 2 # After the SOI marker
+    while pos + 4 <= len(buf):
+        if buf[pos] != 0xFF:
+            return None # Corrupt segment list
+        marker = buf[pos + 1]
+        if marker == 0xFF: # Fill byte
+            pos += 1
+            continue
+        if marker in (0xDA, 0xD9): # Start of scan or end of image: no EXIF segment
+            return None
+        (length,) = struct.unpack_from('>H', buf, pos + 2)
+        if marker == 0xE1 and buf[pos + 4:pos + 10] == b'Exif\x00\x00':
+            return pos + 10
+        pos += 2 + length
+    if complete:
+        return None
+    raise ValueError("En-tête JPEG plus long que le tampon")
+
+def parse_exif_header(buf, complete=False):
+    """
+    Reads the EXIF date from buf, the first bytes of a JPEG or TIFF file
+    (complete tells if buf holds the whole file).
+    Returns None only if the file has no date.
+    Raises ValueError if the file is not a JPEG/TIFF or if its EXIF data
+    is not within buf.
+    """
+    if buf[:2] == b'\xff\xd8': # JPEG: TIFF structure in the "Exif\0\0" APP1 segment
+        start = find_jpeg_exif(buf, complete)
+        if start is None:
+            return None
+    elif buf[:4] in (b'II*\x00', b'MM\x00*'): # TIFF
+        start = 0
+    else:
+        raise ValueError("Format non géré")
     try:
-        # Open image and read EXIF data
-        image = Image.open(filepath)
-        exif_data = {}
-        if hasattr(image, '_getexif'):
-            info = image._getexif()
-            if info:
-                for tag, value in info.items():
-                    decoded = TAGS.get(tag, tag)
-                    exif_data[decoded] = value
+        return parse_tiff_date(buf, start)
+    except struct.error as e:
+        raise ValueError(f"Données EXIF incomplètes: {e}")
 
-        image.close() # Close the image file handle immediately
+def scan_exif_date(filepath):
+    """
+    Reads the EXIF date of a JPEG or TIFF file straight from its first bytes,
+    without any image library. Raises ValueError like parse_exif_header.
+    """
+    with open(filepath, 'rb') as f:
+        buf = f.read(EXIF_HEADER_SIZE)
+    return parse_exif_header(buf, complete=len(buf) < EXIF_HEADER_SIZE)
+
+def read_exif_date(filepath):
+    """
+    Reads the DateTimeOriginal (or DateTimeDigitized) EXIF string of an image.
+    JPEG and TIFF files are parsed directly by scan_exif_date. Other formats use
+    exifread when installed, which only parses the EXIF segment, and PIL otherwise.
+    Returns None if the date is not present.
+    """
+    try:
+        return scan_exif_date(filepath)
+    except ValueError:
+        pass # Not a JPEG/TIFF or EXIF beyond the header, use a full EXIF reader
 
-        # Prioritize DateTimeOriginal or DateTimeDigitized from EXIF
-        date_str = exif_data.get('DateTimeOriginal') or exif_data.get('DateTimeDigitized')
+    if exifread is not None:
+        with open(filepath, 'rb') as f:
+            tags = exifread.process_file(f, stop_tag='DateTimeOriginal', details=False)
+        tag = tags.get('EXIF DateTimeOriginal') or tags.get('EXIF DateTimeDigitized')
+        return str(tag) if tag else None
+
+    # Open image and read EXIF data
+    image = Image.open(filepath)
+    exif_data = {}
+    if hasattr(image, '_getexif'):
+        info = image._getexif()
+        if info:
+            for tag, value in info.items():
+                decoded = TAGS.get(tag, tag)
+                exif_data[decoded] = value
+
+    image.close() # Close the image file handle immediately
+
+    # Prioritize DateTimeOriginal or DateTimeDigitized from EXIF
+    return exif_data.get('DateTimeOriginal') or exif_data.get('DateTimeDigitized')
+
+def get_photo_date(filepath, st=None, exif_date=None):
+    """
+    Attempts to get the date from EXIF data (DateTimeOriginal or DateTimeDigitized).
+    exif_date is the EXIF date string if it was already read ('' if the file has none).
+    Falls back to file modification date if EXIF is not available or unreadable,
+    taken from st (a stat_result or FileStat of the file) when given to avoid another stat() call.
+    Returns a datetime object or None if date cannot be determined.
+    """
+    try:
+        date_str = exif_date if exif_date is not None else read_exif_date(filepath)
 
         if date_str:
             try:
@@ -240,120 +752,173 @@ def get_photo_date(filepath):
 
     # Fallback to modification date if EXIF failed or was not present
     try:
-        timestamp = os.path.getmtime(filepath)
+        timestamp = st.st_mtime if st is not None else os.path.getmtime(filepath)
         return datetime.datetime.fromtimestamp(timestamp)
     except Exception as e:
-        print(f"Erreur lors de la lecture de la date de modification pour {filepath}: {e}")
+        logger.error(f"Erreur lors de la lecture de la date de modification pour {filepath}: {e}")
         return None
 
-def sort_photos(image_paths, destination_base_folder):
+def move_photos_to_folder(day_folder, files):
+    """
+    Moves the given photos into day_folder, renaming them on name collisions.
+    files is a list of (path, stat) tuples, the stat identifies photos already in place.
+    Returns a (moved_count, skipped_count) tuple.
+    """
+    processed_count = 0
+    skipped_count = 0
+
+    # Ensure destination folder exists
+    try:
+        os.makedirs(day_folder, exist_ok=True)
+    except OSError as e:
+         logger.error(f"Erreur: Impossible de créer le dossier de destination {day_folder}: {e}. {len(files)} fichier(s) ignoré(s) pour le tri.")
+         return 0, len(files)
+
+    for filepath, st in files:
+        # Construct new file path
+        filename = os.path.basename(filepath)
+        new_filepath = os.path.join(day_folder, filename)
+
+        # Handle potential filename collisions in destination
+        # This handles cases where photos with the same name from different sources end up in the same date folder
+        try:
+            if not st.st_ino:
+                # os.scandir doesn't fill in the inode on Windows, get it once here
+                st = os.stat(filepath)
+            new_filepath = reserve_unique_path(new_filepath, source_id=(st.st_dev, st.st_ino))
+        except (IOError, OSError) as e:
+            logger.error(f"Erreur lors du déplacement de {filepath} vers {new_filepath}: {e}. Fichier ignoré.")
+            skipped_count += 1
+            continue
+
+        if new_filepath is None:
+            # File is already in the correct location with the correct name
+            # print(f"Fichier déjà à sa place: {filepath}")
+            continue
+
+        try:
+            move_file(filepath, new_filepath)
+            # print(f"Déplacé: {filepath} -> {new_filepath}")
+            processed_count += 1
+        except (IOError, OSError) as e:
+            logger.error(f"Erreur lors du déplacement de {filepath} vers {new_filepath}: {e}. Fichier ignoré.")
+            skipped_count += 1
+            try:
+                os.remove(new_filepath) # Release the placeholder
+            except OSError:
+                pass
+
+    return processed_count, skipped_count
+
+def sort_photos(image_files, destination_base_folder, max_workers=DEFAULT_MAX_WORKERS):
     """
     Sorts photos into a date-based folder structure.
+    image_files is the ImageFiles list returned by get_image_files.
     Example structure: destination_base_folder/YYYY/MM/DD/filename.ext
     Uses get_photo_date to determine the date.
+    Dates are read and files are moved concurrently with max_workers threads.
     """
-    print("\n--- Étape: Tri des photos ---")
+    logger.info("\n--- Étape: Tri des photos ---")
 
-    if not image_paths:
-        print("Aucune photo à trier.")
+    if not image_files:
+        logger.info("Aucune photo à trier.")
         return
 
     if not os.path.exists(destination_base_folder):
         try:
             os.makedirs(destination_base_folder)
-            print(f"Création du dossier de destination pour le tri: {destination_base_folder}")
+            logger.info(f"Création du dossier de destination pour le tri: {destination_base_folder}")
         except OSError as e:
-            print(f"Erreur: Impossible de créer le dossier pour le tri {destination_base_folder}: {e}")
-            print("Tri annulé.")
+            logger.error(f"Erreur: Impossible de créer le dossier pour le tri {destination_base_folder}: {e}")
+            logger.info("Tri annulé.")
             return
 
     processed_count = 0
     skipped_count = 0
 
-    for filepath in image_paths:
-        # Check if file still exists before trying to sort (e.g., if it was moved as a duplicate)
-        if not os.path.exists(filepath):
-            # print(f"Attention: Fichier introuvable ou déjà déplacé, ignoré pour le tri: {filepath}")
-            skipped_count += 1
-            continue
-
-        photo_date = get_photo_date(filepath)
-
-        if photo_date:
-            # Create destination path like destination_base_folder/YYYY/MM/DD/
-            year_folder = os.path.join(destination_base_folder, str(photo_date.year))
-            month_folder = os.path.join(year_folder, photo_date.strftime('%m')) # MM format
-            day_folder = os.path.join(month_folder, photo_date.strftime('%d')) # DD format
-
-            # Ensure destination folder exists
-            try:
-                os.makedirs(day_folder, exist_ok=True)
-            except OSError as e:
-                 print(f"Erreur: Impossible de créer le dossier de destination {day_folder} pour {filepath}: {e}. Fichier ignoré pour le tri.")
-                 skipped_count += 1
-                 continue # Skip this file
-
-            # Construct new file path
-            filename = os.path.basename(filepath)
-            new_filepath = os.path.join(day_folder, filename)
-
-            # Handle potential filename collisions in destination
-            # This handles cases where photos with the same name from different sources end up in the same date folder
-            base, ext = os.path.splitext(new_filepath)
-            counter = 1
-            original_new_filepath = new_filepath
-            while os.path.exists(new_filepath):
-                # Check if the file at new_filepath is actually the SAME file as the source file
-                # This prevents renaming if the file is already where it should be
-                try:
-                    if os.path.samefile(filepath, new_filepath):
-                        # print(f"Fichier déjà à sa place: {filepath}")
-                        break # File is already sorted correctly, no need to move or rename
-                except FileNotFoundError:
-                    # One of the files might not exist anymore, continue with rename logic
-                    pass # os.path.exists check at loop start will handle if new_filepath is invalid
-
-                new_filepath = f"{base}_{counter}{ext}"
-                counter += 1
-
-            # Only move if the destination path is different from the original path
-            try:
-                 if os.path.abspath(filepath) == os.path.abspath(new_filepath) and os.path.exists(new_filepath):
-                      # File is already in the correct location with the correct name
-                      # print(f"Fichier déjà à sa place: {filepath}")
-                      pass
-                 else:
-                    shutil.move(filepath, new_filepath)
-                    # print(f"Déplacé: {filepath} -> {new_filepath}")
-                    processed_count += 1
-            except (IOError, OSError) as e:
-                print(f"Erreur lors du déplacement de {filepath} vers {new_filepath}: {e}. Fichier ignoré.")
+    # Check if files still exist before trying to sort (e.g., if they were moved as duplicates)
+    existing_files = [(filepath, st) for filepath, st in image_files if os.path.exists(filepath)]
+    skipped_count += len(image_files) - len(existing_files)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Phase 1: read the dates and plan the destination folder of each photo
+        files_by_folder = {}
+        day_folders = {} # (year, month, day) -> day folder path, built once per date
+        exif_dates = image_files.exif_dates
+        photo_dates = progress(executor.map(lambda f: get_photo_date(f[0], f[1], exif_dates.get(f[0])), existing_files),
+                               len(existing_files), "Lecture des dates")
+        for (filepath, st), photo_date in zip(existing_files, photo_dates):
+            if photo_date:
+                date_key = (photo_date.year, photo_date.month, photo_date.day)
+                day_folder = day_folders.get(date_key)
+                if day_folder is None:
+                    # Create destination path like destination_base_folder/YYYY/MM/DD/
+                    year, month, day = date_key
+                    day_folder = os.path.join(destination_base_folder, f"{year:04d}", f"{month:02d}", f"{day:02d}")
+                    day_folders[date_key] = day_folder
+                files_by_folder.setdefault(day_folder, []).append((filepath, st))
+            else:
+                # print(f"Impossible de déterminer la date pour {filepath}. Ignoré pour le tri.") # Too verbose
                 skipped_count += 1
-        else:
-            # print(f"Impossible de déterminer la date pour {filepath}. Ignoré pour le tri.") # Too verbose
-            skipped_count += 1
 
+        # Phase 2: move the photos, one task per destination folder so that
+        # no two threads pick a collision-free name in the same folder concurrently
+        futures = [executor.submit(move_photos_to_folder, day_folder, files)
+                   for day_folder, files in files_by_folder.items()]
+        for future in futures:
+            moved, skipped = future.result()
+            processed_count += moved
+            skipped_count += skipped
 
-    print(f"Tri terminé. {processed_count} fichiers déplacés/triés.")
+    logger.info(f"Tri terminé. {processed_count} fichiers déplacés/triés.")
     if skipped_count > 0:
-        print(f"{skipped_count} fichiers ignorés (date non déterminable, erreur, ou déjà traités).")
+        logger.info(f"{skipped_count} fichiers ignorés (date non déterminable, erreur, ou déjà traités).")
 
 
 # --- Main Function ---
+def positive_int(value):
+    """argparse type for options that need an integer >= 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"doit être un entier supérieur ou égal à 1: {value!r}")
+    return number
+
 def main():
     """
     Main function to orchestrate the photo organization process.
     Handles input (command line args or interactive), finds duplicates,
     handles duplicates based on user choice, and sorts photos.
     """
+    log_level_name = (os.environ.get("LOGLEVEL") or "INFO").strip().upper()
+    log_level = int(log_level_name) if log_level_name.isdigit() else logging.getLevelName(log_level_name)
+    logging.basicConfig(stream=sys.stdout, format="%(message)s",
+                        level=log_level if isinstance(log_level, int) else logging.INFO)
+    if not isinstance(log_level, int):
+        logger.warning(f"Attention: LOGLEVEL={log_level_name} inconnu, niveau INFO utilisé.")
+
     print("--- Application de Tri et Nettoyage de Photos ---")
 
     folders_to_process = []
 
     # --- Handle Input Folders (Command Line or Interactive) ---
-    if len(sys.argv) > 1:
+    parser = argparse.ArgumentParser(description="Tri et nettoyage de photos.")
+    parser.add_argument("folders", nargs="*", help="Dossier(s) à scanner.")
+    parser.add_argument("-c", "--max-workers", type=positive_int, default=DEFAULT_MAX_WORKERS,
+                        help=f"Nombre de threads pour le calcul des hash (défaut: {DEFAULT_MAX_WORKERS}).")
+    parser.add_argument("--sequential", action=argparse.BooleanOptionalAction, default=None,
+                        help="Calculer les hash un fichier à la fois, dans l'ordre du disque (pour disques durs). "
+                             "Par défaut, activé uniquement pour les fichiers d'un disque dur détecté (Linux).")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH,
+                        help=f"Fichier SQLite du cache des hash (défaut: {DEFAULT_CACHE_PATH}).")
+    parser.add_argument("--no-cache", action="store_true", help="Ne pas utiliser le cache des hash.")
+    args = parser.parse_args()
+
+    if args.folders:
         # Option 1: Get folders from command line arguments
-        folders_from_args = sys.argv[1:]
+        folders_from_args = args.folders
         print(f"Lecture des dossiers depuis les arguments de la ligne de commande.")
         # Simple validation for command line arguments
         valid_folders = [f for f in folders_from_args if os.path.isdir(f)]
@@ -389,14 +954,16 @@ def main():
     print(f"\nDossier(s) valide(s) à traiter: {folders_to_process}")
 
     # --- Step 2: Scan files ---
-    all_image_paths = get_image_files(folders_to_process)
+    all_image_files = get_image_files(folders_to_process)
 
-    if not all_image_paths:
+    if not all_image_files:
         print("\nAucun fichier image trouvé dans les dossiers spécifiés. Le programme va s'arrêter.")
         return # Exit if no images found
 
     # --- Step 3: Find duplicates ---
-    duplicate_groups = find_duplicates(all_image_paths)
+    duplicate_groups = find_duplicates(all_image_files, max_workers=args.max_workers,
+                                       cache_path=None if args.no_cache else args.cache,
+                                       sequential=args.sequential)
 
     # --- Step 4: Handle duplicates ---
     if duplicate_groups:
@@ -424,7 +991,7 @@ def main():
         print("\nAucun doublon trouvé. Pas de gestion de doublons nécessaire.")
 
     # --- Step 5: Sort photos ---
-    # Important: If duplicates were moved/deleted, some paths in all_image_paths might not exist anymore.
+    # Important: If duplicates were moved/deleted, some paths in all_image_files might not exist anymore.
     # The sort_photos function is designed to check os.path.exists before processing each file,
     # so we can pass the original list.
     print("\n--- Voulez-vous trier les photos restantes par date ? ---")
@@ -435,7 +1002,7 @@ def main():
     if sort_confirm == 'o':
         destination_sort_folder = os.path.join(os.getcwd(), "photos_triees_par_date") # Create in current working directory
         print(f"Les photos seront triées dans: {destination_sort_folder}")
-        sort_photos(all_image_paths, destination_sort_folder)
+        sort_photos(all_image_files, destination_sort_folder, max_workers=args.max_workers)
     else:
         print("Tri des photos ignoré.")
 